@@ -6,9 +6,10 @@ incluindo configurações de arquivos, segurança e interface.
 """
 
 # Configurações de arquivos e diretórios
-DATABASE_FILE = "data/users.json"  # Arquivo principal que armazena dados dos usuários
-BACKUP_FILE = "data/users_backup.json"  # Arquivo de backup para dados dos usuários
-ATTEMPTS_FILE = "data/login_attempts.json"  # Arquivo que armazena tentativas de login
+DATABASE_FILE = "data/users.db"  # Banco SQLite que armazena usuários e bloqueios de login
+BACKUP_FILE = "data/users_backup.db"  # Cópia do banco feita a cada inicialização
+JSON_USERS_FILE = "data/users.json"  # Usuários em JSON: importado na primeira execução e destino da exportação
+JSON_ATTEMPTS_FILE = "data/login_attempts.json"  # Bloqueios em JSON de versões anteriores (importado na primeira execução)
 
 # Configurações de segurança
 MAX_LOGIN_ATTEMPTS = 3  # Número máximo de tentativas de login antes do bloqueio
@@ -16,6 +17,11 @@ LOCKOUT_TIME = 300  # Tempo de bloqueio em segundos (5 minutos)
 PASSWORD_MIN_LENGTH = 6  # Comprimento mínimo para senhas
 ADMIN_USERNAME = "admin"  # Nome de usuário para o administrador padrão
 ADMIN_PASSWORD = "admin123"  # Senha para o administrador padrão (alterar em produção)
+SCRYPT_N = 2 ** 14  # Fator de custo (CPU/memória) do scrypt usado no hash das senhas
+SCRYPT_R = 8  # Tamanho de bloco do scrypt
+SCRYPT_P = 1  # Fator de paralelismo do scrypt
+SALT_LENGTH = 16  # Tamanho em bytes do salt aleatório gerado para cada senha
+LAST_LOGIN_WRITE_POLICY = "hourly"  # Quando gravar o último login: "always", "hourly" ou "never" (pendências são gravadas ao sair)
 
 # Configurações de interface
 SYSTEM_NAME = "SISTEMA DE AUTENTICAÇÃO"  # Nome exibido no cabeçalho do sistema
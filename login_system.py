@@ -5,27 +5,102 @@ Este módulo implementa um sistema completo de autenticação com interface de l
 de comando estilo COBOL. Inclui funcionalidades de login, cadastro de usuários,
 recuperação de senha, e gerenciamento de usuários para administradores.
 
-O sistema utiliza arquivos JSON para persistência de dados e implementa
-mecanismos de segurança como limite de tentativas de login, bloqueio temporário
-de conta, e criptografia de senhas.
+O sistema utiliza um banco SQLite (em modo WAL) para persistência de dados e
+implementa mecanismos de segurança como limite de tentativas de login, bloqueio
+temporário de conta, e hash de senhas com scrypt e salt por usuário.
 """
+import atexit
+import functools
 import json
 import hashlib
+import hmac
+import io
 import os
-import random
-import string
-import getpass
+import secrets
+import sqlite3
 from datetime import datetime, timedelta
 import sys
-from config import (DATABASE_FILE, BACKUP_FILE, ATTEMPTS_FILE, 
+import tempfile
+from config import (DATABASE_FILE, BACKUP_FILE, JSON_USERS_FILE, JSON_ATTEMPTS_FILE,
                    MAX_LOGIN_ATTEMPTS, LOCKOUT_TIME, PASSWORD_MIN_LENGTH,
                    ADMIN_USERNAME, ADMIN_PASSWORD, SYSTEM_NAME,
-                   HEADER_LENGTH, SCREEN_WIDTH)
+                   HEADER_LENGTH, SCREEN_WIDTH, SCRYPT_N, SCRYPT_R, SCRYPT_P,
+                   SALT_LENGTH, LAST_LOGIN_WRITE_POLICY)
+
+try:
+    import orjson  # Serializador JSON em C, opcional
+except ImportError:
+    orjson = None
 
 # Atualizar os caminhos dos arquivos
-DATABASE_FILE = 'data/users.json'
-BACKUP_FILE = 'data/users_backup.json'
-ATTEMPTS_FILE = 'data/login_attempts.json'
+DATABASE_FILE = 'data/users.db'
+BACKUP_FILE = 'data/users_backup.db'
+JSON_USERS_FILE = 'data/users.json'
+JSON_ATTEMPTS_FILE = 'data/login_attempts.json'
+
+# Colunas da tabela de usuários (além do nome de usuário)
+_USER_COLUMNS = ("password", "salt", "kdf", "n", "r", "p", "role",
+                 "created_at", "last_login", "recovery_code")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    salt TEXT,
+    kdf TEXT,
+    n INTEGER,
+    r INTEGER,
+    p INTEGER,
+    role TEXT NOT NULL,
+    created_at TEXT,
+    last_login TEXT,
+    recovery_code TEXT
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    username TEXT PRIMARY KEY,
+    lockout_until TEXT NOT NULL
+);
+"""
+
+# Comandos parametrizados (o sqlite3 mantém os comandos preparados em cache)
+_SQL_SELECT_USERS = f"SELECT username, {', '.join(_USER_COLUMNS)} FROM users ORDER BY rowid"
+_SQL_SELECT_USER = f"SELECT {', '.join(_USER_COLUMNS)} FROM users WHERE username = ?"
+_SQL_LIST_USERS = "SELECT username, role, created_at, last_login FROM users ORDER BY rowid"
+_SQL_INSERT_USER = (f"INSERT INTO users (username, {', '.join(_USER_COLUMNS)}) "
+                    f"VALUES (:username, {', '.join(':' + c for c in _USER_COLUMNS)})")
+_SQL_UPSERT_USER = (
+    f"INSERT INTO users (username, {', '.join(_USER_COLUMNS)}) "
+    f"VALUES (:username, {', '.join(':' + c for c in _USER_COLUMNS)}) "
+    f"ON CONFLICT(username) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in _USER_COLUMNS)}"
+)
+_SQL_UPDATE_LAST_LOGIN = "UPDATE users SET last_login = ? WHERE username = ?"
+_SQL_SELECT_LOCKOUTS = "SELECT username, lockout_until FROM attempts"
+_SQL_SELECT_LOCKOUT = "SELECT lockout_until FROM attempts WHERE username = ?"
+_SQL_UPSERT_LOCKOUT = ("INSERT INTO attempts (username, lockout_until) VALUES (?, ?) "
+                       "ON CONFLICT(username) DO UPDATE SET lockout_until = excluded.lockout_until")
+_SQL_DELETE_LOCKOUT = "DELETE FROM attempts WHERE username = ?"
+_SQL_PRUNE_LOCKOUTS = "DELETE FROM attempts WHERE lockout_until <= ?"
+
+# Valores aceitos em LAST_LOGIN_WRITE_POLICY
+_LAST_LOGIN_POLICIES = frozenset({"always", "hourly", "never"})
+
+def _dumps_json(data):
+    """
+    Serializa dados em JSON indentado, retornando bytes UTF-8.
+    
+    Usa o orjson quando disponível e recorre ao módulo json padrão caso contrário.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _loads_json(blob):
+    """
+    Desserializa bytes JSON. Erros de formato geram json.JSONDecodeError.
+    """
+    if orjson is not None:
+        return orjson.loads(blob)
+    return json.loads(blob)
 
 # Cores para o terminal
 class Colors:
@@ -45,6 +120,32 @@ class Colors:
     UNDERLINE = '\033[4m'  # Texto sublinhado
     ITALIC = '\033[3m'   # Texto em itálico
 
+# Alfabeto dos códigos de recuperação (letras maiúsculas e dígitos)
+_RECOVERY_ALPHABET = tuple("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
+
+# Modelos de linha da tabela de usuários (admin em destaque)
+_ROW = "{:<20}{:<15}{:<25}{:<25}\n"
+_ROW_ADMIN = f"{Colors.WARNING}{{:<20}}{{:<15}}{{:<25}}{{:<25}}{Colors.ENDC}\n"
+
+# Valores especiais exibidos sem formatação de data
+_DATE_SENTINELS = frozenset({"N/A", "Nunca"})
+
+@functools.lru_cache(maxsize=1024)
+def _format_date(date_str):
+    """
+    Converte uma data ISO para "DD/MM/YYYY às HH:MM", memorizando o resultado.
+    
+    Valores especiais ou que não parecem datas são devolvidos sem alteração.
+    """
+    if not date_str or date_str in _DATE_SENTINELS or len(date_str) < 10:
+        return date_str
+    
+    try:
+        dt = datetime.fromisoformat(date_str)
+    except ValueError:
+        return date_str
+    return dt.strftime("%d/%m/%Y às %H:%M")
+
 class LoginSystem:
     """
     Classe principal do sistema de login e gerenciamento de usuários.
@@ -56,103 +157,476 @@ class LoginSystem:
     - Recuperação de senha
     - Listagem de usuários (para administradores)
     """
+    # Hashes calculados uma única vez por processo, já que o scrypt é custoso
+    _admin_fields = None  # Campos de senha do administrador padrão
+    _dummy_user = None  # Registro fictício usado para igualar o tempo de resposta de usuários inexistentes
+
     def __init__(self):
         """
         Inicializa o sistema de login.
         
-        Configura os dicionários para armazenar usuários e tentativas de login,
-        e carrega os dados existentes dos arquivos de persistência.
+        Abre o banco de dados, configura os dicionários para armazenar usuários,
+        tentativas de login e bloqueios, e carrega os dados existentes.
+        
+        As tentativas de login ficam apenas em memória; somente os bloqueios
+        ativos são gravados no banco.
+        
+        Raises:
+            ValueError: Se LAST_LOGIN_WRITE_POLICY tiver um valor desconhecido
         """
+        if LAST_LOGIN_WRITE_POLICY not in _LAST_LOGIN_POLICIES:
+            raise ValueError(f"LAST_LOGIN_WRITE_POLICY inválida: {LAST_LOGIN_WRITE_POLICY!r}. "
+                             f"Use um de: {', '.join(sorted(_LAST_LOGIN_POLICIES))}.")
+        
         self.users = {}  # Dicionário para armazenar dados dos usuários
-        self.login_attempts = {}  # Dicionário para armazenar tentativas de login
-        self.load_data()  # Carrega dados dos arquivos
+        self.login_attempts = {}  # Tentativas recentes em memória: usuário -> {count, first_seen}
+        self.lockouts = {}  # Bloqueios ativos (persistidos): usuário -> data ISO de desbloqueio
+        self._dirty_users = set()  # Usuários com alterações ainda não gravadas
+        self._persisted_login = {}  # Último login já gravado no banco, por usuário
+        if LoginSystem._dummy_user is None:
+            LoginSystem._dummy_user = self._password_fields(secrets.token_hex(16))
+        self._conn = self._connect()  # Conexão com o banco SQLite (None após close())
+        self.load_data()  # Carrega dados do banco
+        atexit.register(self.flush)  # Garante a gravação das pendências se close() não for chamado
+
+    @property
+    def _db(self):
+        """
+        Conexão com o banco, disponível enquanto o sistema estiver aberto.
+        
+        Raises:
+            RuntimeError: Se o sistema já tiver sido encerrado com close()
+        """
+        if self._conn is None:
+            raise RuntimeError("Sistema de login encerrado: a conexão com o banco foi fechada.")
+        return self._conn
+
+    def _connect(self):
+        """
+        Abre o banco SQLite em modo autocommit, com WAL, e cria as tabelas.
+        
+        Com WAL e synchronous=NORMAL, cada alteração grava apenas as linhas
+        modificadas e o SQLite agrupa as sincronizações com o disco.
+        
+        Returns:
+            sqlite3.Connection: Conexão aberta
+        """
+        os.makedirs('data', exist_ok=True)
+        db = sqlite3.connect(DATABASE_FILE, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        return db
         
     def load_data(self):
         """
-        Carrega os dados dos usuários e tentativas de login a partir dos arquivos JSON.
+        Carrega os dados dos usuários e os bloqueios ativos a partir do banco.
         
-        Se os arquivos não existirem ou estiverem corrompidos, cria novas estruturas
-        de dados vazias. Para o arquivo de usuários, cria um usuário administrador padrão
-        se o arquivo não existir.
+        Se o banco estiver vazio, importa os arquivos JSON de versões anteriores
+        quando existirem; caso contrário, cria um usuário administrador padrão.
+        Em seguida, faz uma cópia do banco em BACKUP_FILE.
         """
-        # Carrega os usuários
-        if os.path.exists(DATABASE_FILE):
-            try:
-                with open(DATABASE_FILE, 'r') as file:
-                    self.users = json.load(file)
-            except json.JSONDecodeError:
-                print(f"{Colors.FAIL}Erro ao carregar arquivo de usuários. Criando novo.{Colors.ENDC}")
-                self.users = {}
-        else:
-            # Cria o admin padrão se o arquivo não existir
-            self.users = {
-                ADMIN_USERNAME: {
-                    "password": self.hash_password(ADMIN_PASSWORD),
-                    "role": "admin",
-                    "created_at": str(datetime.now()),
-                    "last_login": None,
-                    "recovery_code": None
-                }
+        self._load_users()
+        
+        if not self.users and os.path.exists(JSON_USERS_FILE):
+            self._import_json()
+        
+        if not self.users:
+            # Cria o admin padrão se não houver usuários
+            if LoginSystem._admin_fields is None:
+                LoginSystem._admin_fields = self._password_fields(ADMIN_PASSWORD)
+            admin = {
+                **LoginSystem._admin_fields,
+                "role": "admin",
+                "created_at": str(datetime.now()),
+                "last_login": None,
+                "recovery_code": None
             }
-            self.save_data()
+            try:
+                self._insert_user(ADMIN_USERNAME, admin)
+            except sqlite3.IntegrityError:
+                # Outra interface criou o admin (e talvez outros usuários) ao mesmo tempo
+                self._load_users()
+            except sqlite3.Error as e:
+                print(f"{Colors.FAIL}Erro ao salvar dados: {str(e)}{Colors.ENDC}")
+                self.users = {ADMIN_USERNAME: admin}
+        
+        # Carrega os bloqueios ativos, descartando os expirados
+        self.login_attempts = {}
+        try:
+            self._db.execute(_SQL_PRUNE_LOCKOUTS, (datetime.now().isoformat(),))
+        except sqlite3.Error as e:
+            print(f"{Colors.FAIL}Erro ao limpar bloqueios expirados: {str(e)}{Colors.ENDC}")
+        self.lockouts = dict(self._db.execute(_SQL_SELECT_LOCKOUTS))
         
-        # Carrega as tentativas de login
-        if os.path.exists(ATTEMPTS_FILE):
+        # Cria um backup do banco
+        try:
+            backup = sqlite3.connect(BACKUP_FILE)
             try:
-                with open(ATTEMPTS_FILE, 'r') as file:
-                    self.login_attempts = json.load(file)
+                self._db.backup(backup)
+            finally:
+                backup.close()
+        except sqlite3.Error as e:
+            print(f"{Colors.FAIL}Erro ao criar backup: {str(e)}{Colors.ENDC}")
+
+    def _load_users(self):
+        """
+        Carrega todos os usuários do banco para o cache em memória.
+        """
+        self.users = {row[0]: dict(zip(_USER_COLUMNS, row[1:]))
+                      for row in self._db.execute(_SQL_SELECT_USERS)}
+        self._persisted_login = {username: data.get("last_login")
+                                 for username, data in self.users.items()}
+
+    def _import_json(self):
+        """
+        Importa usuários e bloqueios dos arquivos JSON usados por versões anteriores.
+        
+        A importação é feita em uma única transação. Em caso de arquivo
+        corrompido, exibe uma mensagem de erro e não importa nada.
+        """
+        try:
+            with open(JSON_USERS_FILE, 'rb') as file:
+                users = _loads_json(file.read())
+        except json.JSONDecodeError:
+            print(f"{Colors.FAIL}Erro ao carregar arquivo de usuários. Criando novo.{Colors.ENDC}")
+            return
+        
+        # Arquivos antigos também traziam contadores, que são descartados
+        lockouts = {}
+        if os.path.exists(JSON_ATTEMPTS_FILE):
+            try:
+                with open(JSON_ATTEMPTS_FILE, 'rb') as file:
+                    data = _loads_json(file.read())
             except json.JSONDecodeError:
-                self.login_attempts = {}
-        else:
-            self.login_attempts = {}
+                data = {}
+            
+            for username, entry in data.items():
+                if isinstance(entry, dict) and entry.get("lockout_until"):
+                    lockouts[username] = entry["lockout_until"]
+        
+        self.users = {username: {c: data.get(c) for c in _USER_COLUMNS}
+                      for username, data in users.items()}
+        self._save_users(self.users)
+        self._transaction(_SQL_UPSERT_LOCKOUT, lockouts.items(), "Erro ao importar bloqueios")
 
     def save_data(self):
         """
-        Salva os dados dos usuários e tentativas de login nos arquivos JSON.
+        Grava no banco as alterações ainda pendentes desta instância.
+        
+        As operações do dia a dia já gravam apenas as colunas alteradas, via
+        `_update_user` e `_save_lockout`; resta pendente somente o último
+        login mantido em memória. Mantido por compatibilidade, equivale a `flush`.
+        """
+        self.flush()
+
+    def _transaction(self, sql, rows, error_message):
+        """
+        Executa um comando para cada linha informada, em uma única transação.
+        
+        Em caso de erro, a transação é desfeita e uma mensagem é exibida.
+        
+        Args:
+            sql (str): Comando SQL parametrizado
+            rows (iterable): Parâmetros de cada execução
+            error_message (str): Mensagem exibida antes do erro
+            
+        Returns:
+            bool: True se a transação foi confirmada
+        """
+        try:
+            self._db.execute("BEGIN")
+            with self._db:
+                self._db.executemany(sql, rows)
+        except sqlite3.Error as e:
+            print(f"{Colors.FAIL}{error_message}: {str(e)}{Colors.ENDC}")
+            return False
+        return True
+
+    def _insert_user(self, username, user):
+        """
+        Insere um novo usuário no banco e no cache em memória.
         
-        Antes de salvar os dados dos usuários, cria um backup do arquivo atual
-        como medida de segurança contra corrupção de dados.
+        Usa um INSERT simples: se outra interface já tiver criado o mesmo
+        nome, o banco recusa a linha em vez de sobrescrevê-la.
+        
+        Args:
+            username (str): Nome do novo usuário
+            user (dict): Dados do usuário
+            
+        Raises:
+            sqlite3.IntegrityError: Se o usuário já existir no banco
+        """
+        self._db.execute(_SQL_INSERT_USER, {"username": username,
+                                            **{c: user.get(c) for c in _USER_COLUMNS}})
+        self.users[username] = user
+        self._persisted_login[username] = user.get("last_login")
+
+    def _save_users(self, usernames):
+        """
+        Grava no banco as linhas completas dos usuários informados, em uma única
+        transação. Usado apenas na importação dos arquivos JSON.
         
         Em caso de erro durante o salvamento, exibe mensagens de erro apropriadas.
+        
+        Args:
+            usernames (iterable): Nomes dos usuários a serem gravados
         """
-        # Cria o diretório 'data' se não existir
-        if not os.path.exists('data'):
-            os.makedirs('data')
+        usernames = list(usernames)
+        rows = [{"username": username, **{c: self.users[username].get(c) for c in _USER_COLUMNS}}
+                for username in usernames]
+        if not self._transaction(_SQL_UPSERT_USER, rows, "Erro ao salvar dados"):
+            return
+        
+        self._dirty_users.difference_update(usernames)
+        for username in usernames:
+            self._persisted_login[username] = self.users[username].get("last_login")
 
-        # Cria um backup antes de salvar
-        if os.path.exists(DATABASE_FILE):
-            try:
-                with open(DATABASE_FILE, 'r') as file:
-                    with open(BACKUP_FILE, 'w') as backup:
-                        backup.write(file.read())
-            except Exception as e:
-                print(f"{Colors.FAIL}Erro ao criar backup: {str(e)}{Colors.ENDC}")
+    def _update_user(self, username, **fields):
+        """
+        Grava no banco apenas as colunas informadas de um usuário.
+        
+        Atualizar somente o que mudou evita sobrescrever alterações feitas
+        por outras interfaces em outras colunas da mesma linha.
         
-        # Salva os usuários
+        Args:
+            username (str): Nome do usuário
+            **fields: Colunas e seus novos valores
+            
+        Returns:
+            bool: True se a gravação foi bem-sucedida
+        """
+        assignments = ", ".join(f"{column} = :{column}" for column in fields)
         try:
-            with open(DATABASE_FILE, 'w') as file:
-                json.dump(self.users, file, indent=4)
-        except Exception as e:
+            self._db.execute(f"UPDATE users SET {assignments} WHERE username = :username",
+                             {"username": username, **fields})
+        except sqlite3.Error as e:
             print(f"{Colors.FAIL}Erro ao salvar dados: {str(e)}{Colors.ENDC}")
+            return False
+        
+        self.users[username].update(fields)
+        if "last_login" in fields:
+            self._dirty_users.discard(username)
+            self._persisted_login[username] = fields["last_login"]
+        return True
+
+    def get_user(self, username):
+        """
+        Lê do banco os dados atuais de um usuário e atualiza o cache em memória.
+        
+        Outras interfaces podem ter alterado o usuário desde o carregamento;
+        um último login ainda não gravado por esta instância é preservado.
+        
+        Args:
+            username (str): Nome do usuário
+            
+        Returns:
+            dict: Dados do usuário, ou None se ele não existir
+        """
+        row = self._db.execute(_SQL_SELECT_USER, (username,)).fetchone()
+        if row is None:
+            self.users.pop(username, None)
+            return None
+        
+        user = dict(zip(_USER_COLUMNS, row))
+        self._persisted_login[username] = user["last_login"]
+        if username in self._dirty_users:
+            user["last_login"] = self.users[username]["last_login"]
+        self.users[username] = user
+        return user
+
+    def _load_lockout(self, username):
+        """
+        Lê do banco o bloqueio atual de um usuário, que pode ter sido
+        definido por outra interface, e atualiza o cache em memória.
+        
+        Args:
+            username (str): Nome do usuário
+            
+        Returns:
+            str: Data ISO de desbloqueio, ou None se não houver bloqueio
+        """
+        row = self._db.execute(_SQL_SELECT_LOCKOUT, (username,)).fetchone()
+        if row is None:
+            self.lockouts.pop(username, None)
+            return None
+        self.lockouts[username] = row[0]
+        return row[0]
+
+    def _save_lockout(self, username):
+        """
+        Grava ou remove o bloqueio de um usuário no banco.
+        
+        Também descarta bloqueios expirados e contadores em memória mais
+        antigos que duas vezes LOCKOUT_TIME.
+        
+        Args:
+            username (str): Nome do usuário cujo bloqueio mudou
+        """
+        self._prune_attempts(datetime.now())
         
-        # Salva as tentativas de login
         try:
-            with open(ATTEMPTS_FILE, 'w') as file:
-                json.dump(self.login_attempts, file, indent=4)
-        except Exception as e:
+            lockout_until = self.lockouts.get(username)
+            if lockout_until is None:
+                self._db.execute(_SQL_DELETE_LOCKOUT, (username,))
+            else:
+                self._db.execute(_SQL_UPSERT_LOCKOUT, (username, lockout_until))
+        except sqlite3.Error as e:
             print(f"{Colors.FAIL}Erro ao salvar tentativas de login: {str(e)}{Colors.ENDC}")
 
-    def hash_password(self, password):
+    def _prune_attempts(self, now):
+        """
+        Remove bloqueios expirados e contadores de tentativas antigos.
+        
+        Args:
+            now (datetime): Instante de referência
+        """
+        horizon = now - timedelta(seconds=2 * LOCKOUT_TIME)
+        for username in [u for u, a in self.login_attempts.items() if a["first_seen"] < horizon]:
+            del self.login_attempts[username]
+        
+        for username in [u for u, until in self.lockouts.items()
+                         if datetime.fromisoformat(until) <= now]:
+            del self.lockouts[username]
+        
+        try:
+            self._db.execute(_SQL_PRUNE_LOCKOUTS, (now.isoformat(),))
+        except sqlite3.Error as e:
+            print(f"{Colors.FAIL}Erro ao limpar bloqueios expirados: {str(e)}{Colors.ENDC}")
+
+    def flush(self):
+        """
+        Grava imediatamente todas as alterações pendentes.
+        
+        Chamado automaticamente ao encerrar o programa.
+        """
+        if not self._dirty_users:
+            return
+        
+        usernames = list(self._dirty_users)
+        rows = [(self.users[username]["last_login"], username) for username in usernames]
+        if not self._transaction(_SQL_UPDATE_LAST_LOGIN, rows, "Erro ao salvar dados"):
+            return
+        
+        for last_login, username in rows:
+            self._persisted_login[username] = last_login
+        self._dirty_users.difference_update(usernames)
+
+    def close(self):
+        """
+        Grava as alterações pendentes e fecha a conexão com o banco.
+        
+        Também remove o registro em atexit, liberando a instância. Chamadas
+        repetidas não têm efeito; qualquer outra operação que acesse o banco
+        depois disso gera RuntimeError.
+        """
+        if self._conn is None:
+            return
+        
+        self.flush()
+        atexit.unregister(self.flush)
+        self._conn.close()
+        self._conn = None
+
+    def export_json(self, path=JSON_USERS_FILE):
         """
-        Criptografa a senha usando o algoritmo SHA-256.
+        Exporta os usuários para um arquivo JSON, no formato das versões anteriores.
+        
+        Os usuários são lidos do banco, incluindo os criados ou alterados por
+        outras interfaces desde o carregamento.
+        
+        O arquivo é gravado de forma atômica: primeiro em um arquivo temporário
+        no mesmo diretório, depois movido para o destino com `os.replace`.
+        
+        Args:
+            path (str, optional): Arquivo de destino. Padrão: JSON_USERS_FILE
+            
+        Returns:
+            tuple: (bool, str) - Sucesso da operação e mensagem explicativa
+        """
+        self.flush()
+        try:
+            users = {row[0]: dict(zip(_USER_COLUMNS, row[1:]))
+                     for row in self._db.execute(_SQL_SELECT_USERS)}
+        except sqlite3.Error as e:
+            return False, f"Erro ao exportar dados: {str(e)}"
+        blob = _dumps_json(users)
+        
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=os.path.dirname(path) or '.',
+                                             suffix='.tmp', delete=False) as tmp:
+                tmp_path = tmp.name
+                tmp.write(blob)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False, f"Erro ao exportar dados: {str(e)}"
+        
+        return True, f"Usuários exportados para {path}."
+
+    def hash_password(self, password, salt):
+        """
+        Gera o hash da senha usando a função de derivação de chave scrypt.
+        
+        O scrypt é propositalmente custoso em memória e processamento, o que
+        torna ataques de força bruta contra hashes vazados muito mais lentos.
         
         Args:
             password (str): Senha em texto plano a ser criptografada
+            salt (bytes): Salt aleatório associado ao usuário
             
         Returns:
             str: Hash hexadecimal da senha
         """
-        return hashlib.sha256(password.encode()).hexdigest()
+        return hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N,
+                              r=SCRYPT_R, p=SCRYPT_P, dklen=32).hex()
+
+    def _password_fields(self, password):
+        """
+        Gera os campos de senha a serem armazenados para um usuário.
+        
+        Args:
+            password (str): Senha em texto plano
+            
+        Returns:
+            dict: Hash, salt e parâmetros do scrypt utilizados
+        """
+        salt = os.urandom(SALT_LENGTH)
+        return {
+            "password": self.hash_password(password, salt),
+            "salt": salt.hex(),
+            "kdf": "scrypt",
+            "n": SCRYPT_N,
+            "r": SCRYPT_R,
+            "p": SCRYPT_P
+        }
+
+    def _check_password(self, user, password):
+        """
+        Verifica se a senha informada corresponde à armazenada para o usuário.
+        
+        Usa os parâmetros gravados junto ao hash e faz a comparação em tempo
+        constante. Usuários antigos, com hash SHA-256 sem salt, continuam
+        sendo aceitos para que possam ser migrados no próximo login.
+        
+        Args:
+            user (dict): Dados do usuário
+            password (str): Senha em texto plano
+            
+        Returns:
+            bool: True se a senha estiver correta
+        """
+        if user.get("kdf") == "scrypt":
+            computed = hashlib.scrypt(password.encode(), salt=bytes.fromhex(user["salt"]),
+                                      n=user["n"], r=user["r"], p=user["p"],
+                                      dklen=32).hex()
+        else:
+            computed = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(user["password"], computed)
     
     def register(self, username, password, confirm_password):
         """
@@ -180,15 +654,20 @@ class LoginSystem:
             return False, "As senhas não conferem."
         
         # Registro do usuário
-        self.users[username] = {
-            "password": self.hash_password(password),
+        user = {
+            **self._password_fields(password),
             "role": "user",
             "created_at": str(datetime.now()),
             "last_login": None,
             "recovery_code": None
         }
         
-        self.save_data()
+        try:
+            self._insert_user(username, user)
+        except sqlite3.IntegrityError:
+            return False, "Usuário já existe."
+        except sqlite3.Error as e:
+            return False, f"Erro ao salvar dados: {str(e)}"
         return True, "Usuário registrado com sucesso!"
     
     def login(self, username, password):
@@ -205,50 +684,92 @@ class LoginSystem:
         Returns:
             tuple: (bool, str) - Sucesso do login e mensagem explicativa
         """
-        # Verifica se o usuário existe
-        if username not in self.users:
+        # Verifica se o usuário existe (lendo a versão atual do banco)
+        user = self.get_user(username)
+        if user is None:
+            # Calcula um hash mesmo assim, para não revelar pelo tempo se o usuário existe
+            self._check_password(self._dummy_user, password)
             return False, "Usuário não encontrado."
         
-        # Verifica se o usuário está bloqueado
-        if username in self.login_attempts:
-            attempts = self.login_attempts[username]
-            if "lockout_until" in attempts:
-                lockout_time = datetime.fromisoformat(attempts["lockout_until"])
-                if datetime.now() < lockout_time:
-                    remaining = (lockout_time - datetime.now()).seconds
-                    return False, f"Conta bloqueada. Tente novamente em {remaining} segundos."
-                else:
-                    # Remove o bloqueio
-                    del self.login_attempts[username]["lockout_until"]
-                    self.login_attempts[username]["count"] = 0
+        now = datetime.now()  # Instante único usado em todo o processamento do login
+        
+        # Verifica se o usuário está bloqueado, inclusive por outra interface
+        lockout_until = self._load_lockout(username)
+        if lockout_until is not None:
+            lockout_time = datetime.fromisoformat(lockout_until)
+            if now < lockout_time:
+                remaining = (lockout_time - now).seconds
+                return False, f"Conta bloqueada. Tente novamente em {remaining} segundos."
+            else:
+                # Remove o bloqueio
+                del self.lockouts[username]
+                self.login_attempts.pop(username, None)
+                self._save_lockout(username)
         
         # Verifica a senha
-        if self.users[username]["password"] != self.hash_password(password):
-            # Incrementa as tentativas de login
-            if username not in self.login_attempts:
-                self.login_attempts[username] = {"count": 0}
+        if not self._check_password(user, password):
+            # Incrementa as tentativas de login (apenas em memória), reiniciando
+            # a contagem se as falhas anteriores estiverem fora da janela de bloqueio
+            attempts = self.login_attempts.get(username)
+            if attempts is None or now - attempts["first_seen"] > timedelta(seconds=LOCKOUT_TIME):
+                attempts = self.login_attempts[username] = {"count": 0, "first_seen": now}
             
-            self.login_attempts[username]["count"] += 1
+            attempts["count"] += 1
             
             # Bloqueia a conta após MAX_LOGIN_ATTEMPTS tentativas
-            if self.login_attempts[username]["count"] >= MAX_LOGIN_ATTEMPTS:
-                lockout_until = datetime.now() + timedelta(seconds=LOCKOUT_TIME)
-                self.login_attempts[username]["lockout_until"] = lockout_until.isoformat()
-                self.save_data()
+            if attempts["count"] >= MAX_LOGIN_ATTEMPTS:
+                lockout_until = now + timedelta(seconds=LOCKOUT_TIME)
+                self.lockouts[username] = lockout_until.isoformat()
+                del self.login_attempts[username]
+                self._save_lockout(username)
                 return False, f"Conta bloqueada por {LOCKOUT_TIME//60} minutos devido a muitas tentativas incorretas."
             
-            remaining = MAX_LOGIN_ATTEMPTS - self.login_attempts[username]["count"]
-            self.save_data()
+            remaining = MAX_LOGIN_ATTEMPTS - attempts["count"]
             return False, f"Senha incorreta. Tentativas restantes: {remaining}."
         
         # Login bem-sucedido
-        if username in self.login_attempts:
-            self.login_attempts[username]["count"] = 0
+        self.login_attempts.pop(username, None)
         
-        self.users[username]["last_login"] = str(datetime.now())
-        self.save_data()
+        last_login = now.isoformat()
+        
+        # Migra hashes antigos (SHA-256) para scrypt
+        if user.get("kdf") != "scrypt":
+            self._update_user(username, **self._password_fields(password), last_login=last_login)
+        elif self._should_write_last_login(self._persisted_login.get(username), now):
+            self._update_user(username, last_login=last_login)
+        else:
+            # Mantém apenas em memória; será gravado no próximo salvamento ou ao sair
+            user["last_login"] = last_login
+            self._dirty_users.add(username)
         return True, "Login realizado com sucesso!"
 
+    def _should_write_last_login(self, persisted_login, now):
+        """
+        Decide se a atualização do último login deve ser gravada em disco.
+        
+        Segue LAST_LOGIN_WRITE_POLICY: "always" grava sempre, "never" nunca
+        grava só por causa do login e "hourly" grava quando o último login
+        gravado no banco tiver mais de uma hora.
+        
+        Args:
+            persisted_login (str): Último login já gravado no banco para o usuário
+            now (datetime): Instante do login atual
+            
+        Returns:
+            bool: True se o usuário deve ser salvo agora
+        """
+        if LAST_LOGIN_WRITE_POLICY == "always":
+            return True
+        if LAST_LOGIN_WRITE_POLICY == "never":
+            return False
+        
+        if not persisted_login:
+            return True
+        try:
+            return now - datetime.fromisoformat(persisted_login) > timedelta(hours=1)
+        except ValueError:
+            return True
+
     def list_users(self):
         """
         Lista todos os usuários cadastrados no sistema.
@@ -259,6 +780,21 @@ class LoginSystem:
             dict: Dicionário contendo todos os dados dos usuários
         """
         return self.users
+
+    def iter_users(self):
+        """
+        Percorre os usuários cadastrados como pares (nome, dados).
+        
+        Os registros são lidos diretamente do banco, apenas com as colunas
+        exibidas na listagem, sem copiar todos os dados de cada usuário.
+        Alterações pendentes são gravadas antes da leitura.
+        
+        Yields:
+            tuple: (str, dict) - Nome do usuário, papel e datas de criação e último login
+        """
+        self.flush()
+        for username, role, created_at, last_login in self._db.execute(_SQL_LIST_USERS):
+            yield username, {"role": role, "created_at": created_at, "last_login": last_login}
     
     def generate_recovery_code(self, username):
         """
@@ -273,13 +809,13 @@ class LoginSystem:
         Returns:
             tuple: (bool, str) - Sucesso da operação e código/mensagem de erro
         """
-        if username not in self.users:
+        if self.get_user(username) is None:
             return False, "Usuário não encontrado."
         
-        # Gera um código aleatório
-        recovery_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        self.users[username]["recovery_code"] = recovery_code
-        self.save_data()
+        # Gera um código aleatório com gerador criptograficamente seguro
+        recovery_code = ''.join(secrets.choice(_RECOVERY_ALPHABET) for _ in range(8))
+        if not self._update_user(username, recovery_code=recovery_code):
+            return False, "Erro ao salvar dados. Tente novamente."
         
         return True, recovery_code
     
@@ -295,11 +831,10 @@ class LoginSystem:
         Returns:
             tuple: (bool, str) - Sucesso da operação e mensagem explicativa
         """
-        if username not in self.users:
+        user = self.get_user(username)
+        if user is None:
             return False, "Usuário não encontrado."
         
-        user = self.users[username]
-        
         if not user["recovery_code"] or user["recovery_code"] != recovery_code:
             return False, "Código de recuperação inválido."
         
@@ -307,9 +842,8 @@ class LoginSystem:
             return False, f"A nova senha deve ter pelo menos {PASSWORD_MIN_LENGTH} caracteres."
         
         # Atualiza a senha
-        user["password"] = self.hash_password(new_password)
-        user["recovery_code"] = None
-        self.save_data()
+        if not self._update_user(username, **self._password_fields(new_password), recovery_code=None):
+            return False, "Erro ao salvar dados. Tente novamente."
         
         return True, "Senha redefinida com sucesso!"
 
@@ -331,42 +865,73 @@ class CobolInterface:
         self.system = LoginSystem()  # Instância do sistema de login
         self.logged_user = None      # Usuário atualmente logado (None se ninguém estiver logado)
         self.is_admin = False        # Flag indicando se o usuário logado é admin
+        
+        # Cabeçalho pré-montado, já que seu conteúdo não muda durante a execução
+        border = Colors.BLUE + "*" * HEADER_LENGTH + Colors.ENDC
+        blank = Colors.BLUE + "*" + " " * (HEADER_LENGTH - 2) + "*" + Colors.ENDC
+        title = (Colors.BLUE + "*" + Colors.BOLD + SYSTEM_NAME.center(HEADER_LENGTH - 2)
+                 + Colors.ENDC + Colors.BLUE + "*" + Colors.ENDC)
+        self._header_block = '\n'.join([border, blank, title, blank, border, '']) + '\n'
+    
+    def close(self):
+        """
+        Encerra a interface, fechando o sistema de login.
+        """
+        self.system.close()
     
-    def clear_screen(self):
+    def clear_screen(self, out=None):
         """
         Limpa a tela do terminal.
         
-        Usa comandos específicos do sistema operacional para limpar o terminal,
-        proporcionando uma interface mais limpa entre os diferentes menus.
+        Usa sequências de escape ANSI, evitando criar um processo a cada troca
+        de menu. Para terminais antigos sem suporte a ANSI, defina a variável
+        de ambiente SISLOGIN_LEGACY_CLEAR para usar os comandos do sistema
+        operacional ('cls' ou 'clear').
+        
+        O comando do sistema operacional limpa o terminal imediatamente, por
+        isso deve ser chamado antes de qualquer escrita no quadro em `out`.
+        
+        Args:
+            out (file, optional): Destino da saída. Padrão: sys.stdout
         """
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if os.environ.get("SISLOGIN_LEGACY_CLEAR"):
+            sys.stdout.flush()
+            os.system('cls' if os.name == 'nt' else 'clear')
+            return
+        if out is None or out is sys.stdout:
+            sys.stdout.write('\x1b[2J\x1b[H')
+            sys.stdout.flush()
+        else:
+            out.write('\x1b[2J\x1b[H')
     
-    def print_header(self):
+    def print_header(self, out=None):
         """
         Imprime o cabeçalho estilizado do sistema no estilo COBOL.
         
         Exibe o nome do sistema dentro de uma caixa delimitada por asteriscos,
         com formatação colorida para melhor visualização.
+        
+        Args:
+            out (file, optional): Destino da saída. Padrão: sys.stdout
         """
-        self.clear_screen()
-        print(Colors.BLUE + "*" * HEADER_LENGTH + Colors.ENDC)
-        print(Colors.BLUE + "*" + " " * (HEADER_LENGTH - 2) + "*" + Colors.ENDC)
-        print(Colors.BLUE + "*" + Colors.BOLD + SYSTEM_NAME.center(HEADER_LENGTH - 2) + Colors.ENDC + Colors.BLUE + "*" + Colors.ENDC)
-        print(Colors.BLUE + "*" + " " * (HEADER_LENGTH - 2) + "*" + Colors.ENDC)
-        print(Colors.BLUE + "*" * HEADER_LENGTH + Colors.ENDC)
-        print()
+        out = sys.stdout if out is None else out
+        self.clear_screen(out)
+        out.write(self._header_block)
     
-    def print_menu(self, options):
+    def print_menu(self, options, out=None):
         """
         Imprime um menu de opções para o usuário.
         
         Args:
             options (list): Lista de strings com as opções do menu
+            out (file, optional): Destino da saída. Padrão: sys.stdout
         """
+        out = sys.stdout if out is None else out
+        buf = io.StringIO()
         for idx, option in enumerate(options, 1):
-            print(f"{Colors.GREEN}{idx}. {option}{Colors.ENDC}")
-        print(f"{Colors.GREEN}0. Sair{Colors.ENDC}")
-        print()
+            buf.write(f"{Colors.GREEN}{idx}. {option}{Colors.ENDC}\n")
+        buf.write(f"{Colors.GREEN}0. Sair{Colors.ENDC}\n\n")
+        out.write(buf.getvalue())
     
     def get_input(self, prompt):
         """
@@ -396,6 +961,7 @@ class CobolInterface:
         """
         print(f"{Colors.BOLD}{prompt}: {Colors.ENDC}", end="")
         print(f"{Colors.WARNING}(A senha não será exibida enquanto você digita){Colors.ENDC}")
+        import getpass  # Importado sob demanda: só é necessário ao pedir senhas
         try:
             return getpass.getpass("")
         except Exception as e:
@@ -429,7 +995,7 @@ class CobolInterface:
         username = self.get_input("Nome de usuário")
         
         # Verifica antecipadamente se o usuário já existe
-        if username in self.system.users:
+        if self.system.get_user(username) is not None:
             self.show_message(f"O usuário '{username}' já existe no sistema. Por favor, escolha outro nome de usuário.", True)
             return
         
@@ -452,7 +1018,7 @@ class CobolInterface:
         username = self.get_input("Nome de usuário")
         
         # Verifica antecipadamente se o usuário existe
-        if username not in self.system.users:
+        if self.system.get_user(username) is None:
             self.show_message(f"O usuário '{username}' não existe no sistema.", True)
             return
         
@@ -475,52 +1041,48 @@ class CobolInterface:
         Returns:
             str: Data formatada como "DD/MM/YYYY às HH:MM" ou o valor especial original
         """
-        if date_str in ["N/A", "Nunca", None]:
-            return date_str
-        
-        try:
-            dt = datetime.fromisoformat(date_str)
-            return dt.strftime("%d/%m/%Y às %H:%M")
-        except ValueError:
-            return date_str
+        return _format_date(date_str)
     
-    def list_users_menu(self):
+    def list_users_menu(self, out=None):
         """
         Exibe e gerencia o menu de listagem de usuários.
         
         Este menu é acessível apenas para administradores e exibe
         uma tabela formatada com todos os usuários cadastrados.
+        
+        Args:
+            out (file, optional): Destino da saída. Padrão: sys.stdout
         """
         if not self.is_admin:
             self.show_message("Acesso negado! Apenas administradores podem acessar esta função.", True)
             return
         
-        self.print_header()
-        print(f"{Colors.BOLD}{Colors.BLUE}LISTA DE USUÁRIOS CADASTRADOS{Colors.ENDC}\n")
+        out = sys.stdout if out is None else out
+        buf = io.StringIO()
+        self.print_header(buf)
+        separator = f"{Colors.BLUE}{'-' * SCREEN_WIDTH}{Colors.ENDC}\n"
         
-        users = self.system.list_users()
+        # Título e cabeçalho da tabela com cores
+        buf.write(f"{Colors.BOLD}{Colors.BLUE}LISTA DE USUÁRIOS CADASTRADOS{Colors.ENDC}\n\n")
+        buf.write(f"{Colors.BOLD}{'Usuário':<20}{'Papel':<15}{'Criado em':<25}{'Último login':<25}{Colors.ENDC}\n")
+        buf.write(separator)
         
-        # Cabeçalho da tabela com cores
-        print(f"{Colors.BOLD}{'Usuário':<20}{'Papel':<15}{'Criado em':<25}{'Último login':<25}{Colors.ENDC}")
-        print(f"{Colors.BLUE}{'-' * SCREEN_WIDTH}{Colors.ENDC}")
-        
-        # Contador de usuários
         count = 0
-        
-        for username, data in users.items():
+        for username, data in self.system.iter_users():
             count += 1
             role = data.get("role", "user")
-            created_at = self.format_date(data.get("created_at", "N/A"))
-            last_login = self.format_date(data.get("last_login", "Nunca"))
+            created_at = self.format_date(data.get("created_at") or "N/A")
+            last_login = self.format_date(data.get("last_login") or "Nunca")
             
             # Destaque para o admin
-            if role == "admin":
-                print(f"{Colors.WARNING}{username:<20}{role:<15}{created_at:<25}{last_login:<25}{Colors.ENDC}")
-            else:
-                print(f"{username:<20}{role:<15}{created_at:<25}{last_login:<25}")
+            row = _ROW_ADMIN if role == "admin" else _ROW
+            buf.write(row.format(username, role, created_at, last_login))
         
-        print(f"{Colors.BLUE}{'-' * SCREEN_WIDTH}{Colors.ENDC}")
-        print(f"\n{Colors.BOLD}Total de usuários: {count}{Colors.ENDC}")
+        buf.write(separator)
+        buf.write(f"\n{Colors.BOLD}Total de usuários: {count}{Colors.ENDC}\n")
+        
+        # A tela inteira é emitida de uma só vez
+        out.write(buf.getvalue())
         
         input(f"\n{Colors.BOLD}Pressione ENTER para voltar ao menu principal...{Colors.ENDC}")
     
@@ -540,7 +1102,7 @@ class CobolInterface:
             username = self.get_input("Nome de usuário")
             
             # Verifica antecipadamente se o usuário existe
-            if username not in self.system.users:
+            if self.system.get_user(username) is None:
                 self.show_message(f"O usuário '{username}' não existe no sistema.", True)
                 return
                 
@@ -557,14 +1119,15 @@ class CobolInterface:
             username = self.get_input("Nome de usuário")
             
             # Verifica antecipadamente se o usuário existe
-            if username not in self.system.users:
+            user = self.system.get_user(username)
+            if user is None:
                 self.show_message(f"O usuário '{username}' não existe no sistema.", True)
                 return
                 
             recovery_code = self.get_input("Código de recuperação")
             
             # Verifica se o código de recuperação foi configurado
-            if not self.system.users[username].get("recovery_code"):
+            if not user.get("recovery_code"):
                 self.show_message("Este usuário não possui um código de recuperação ativo. Gere um primeiro.", True)
                 return
                 
@@ -585,14 +1148,17 @@ class CobolInterface:
         diversas opções escolhidas.
         """
         while True:
-            self.print_header()
+            # Cabeçalho, sessão e menu são montados em um único quadro
+            frame = io.StringIO()
+            self.print_header(frame)
             
             if self.logged_user:
                 role = "Administrador" if self.is_admin else "Usuário"
-                print(f"Logado como: {Colors.BOLD}{self.logged_user}{Colors.ENDC} ({role})\n")
+                frame.write(f"Logado como: {Colors.BOLD}{self.logged_user}{Colors.ENDC} ({role})\n\n")
                 
                 if self.is_admin:
-                    self.print_menu(["Visualizar todos os usuários do sistema", "Sair da conta"])
+                    self.print_menu(["Visualizar todos os usuários do sistema", "Sair da conta"], frame)
+                    sys.stdout.write(frame.getvalue())
                     option = self.get_input("Escolha uma opção")
                     
                     if option == "1":
@@ -605,7 +1171,8 @@ class CobolInterface:
                         self.show_message("Opção inválida!", True)
                 
                 else:
-                    self.print_menu(["Sair da conta"])
+                    self.print_menu(["Sair da conta"], frame)
+                    sys.stdout.write(frame.getvalue())
                     option = self.get_input("Escolha uma opção")
                     
                     if option == "1" or option == "0":
@@ -615,7 +1182,8 @@ class CobolInterface:
                         self.show_message("Opção inválida!", True)
             
             else:
-                self.print_menu(["Login", "Cadastrar", "Recuperar senha"])
+                self.print_menu(["Login", "Cadastrar", "Recuperar senha"], frame)
+                sys.stdout.write(frame.getvalue())
                 option = self.get_input("Escolha uma opção")
                 
                 if option == "1":
@@ -636,8 +1204,21 @@ if __name__ == "__main__":
     Ponto de entrada do programa.
     
     Inicializa a interface e trata exceções para garantir que o programa
-    seja encerrado de forma elegante.
+    seja encerrado de forma elegante. Com `--export-json [arquivo]`, apenas
+    exporta os usuários para JSON e encerra.
     """
+    if len(sys.argv) > 1 and sys.argv[1] == "--export-json":
+        path = sys.argv[2] if len(sys.argv) > 2 else JSON_USERS_FILE
+        system = LoginSystem()
+        try:
+            success, message = system.export_json(path)
+        finally:
+            system.close()
+        color = Colors.GREEN if success else Colors.FAIL
+        print(f"{color}{message}{Colors.ENDC}")
+        sys.exit(0 if success else 1)
+    
+    interface = None
     try:
         interface = CobolInterface()  # Cria a interface
         interface.run()               # Inicia o sistema
@@ -646,3 +1227,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n{Colors.FAIL}Erro inesperado: {str(e)}{Colors.ENDC}")
         input("Pressione ENTER para sair...")
+    finally:
+        if interface is not None:
+            interface.close()  # Grava pendências e fecha o banco